@@ -4,13 +4,54 @@ import random
 import time
 import json
 import os
+import sys
 import csv
+import atexit
+import numpy as np
+#orjson serialises several times faster than stdlib json, fall back if missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+#CuPy enables the optional GPU mass-simulation path, CPU paths work without it
+try:
+    import cupy as cp
+except ImportError:
+    cp = None
+#Numba JIT for the hot classification kernel, engine still runs without it (just slower)
+try:
+    from numba import njit, prange
+    _HAVE_NUMBA = True
+except ImportError:
+    def njit(**kwargs):
+        #Plain-python stand-in, the uint64 wraparound in the PCG kernels is
+        #intentional so numpy's overflow warnings are suppressed around the call
+        def wrap(func):
+            def run(*args):
+                with np.errstate(over="ignore"):
+                    return func(*args)
+            return run
+        return wrap
+    prange = range
+    _HAVE_NUMBA = False
 
 #-------- Compnonents and sensor classes --------
 """In this section there is the senor class which acts as a base template for the other compnent classes, they inherrit
 sensor class and then when reading the components they return a value generated from their ranges and options"""
 
+#Code -> name tables shared by the per-cycle draws and the pregenerated columns,
+#indexing a tuple by a cheap integer draw beats random.choice on a fresh list
+OP_NAMES = ("cutting", "drilling", "idle")
+TASK_NAMES = ("load_material", "unload_part", "assemble_component", "idle")
+STATION_NAMES = ("Station A", "Station B", "Inspection", "Exit")
+RESULT_NAMES = ("PASS", "FAIL")
+#Bound once at module level to skip the method lookup per draw
+_randrange = random.randrange
+
 class Sensor:
+    #Fixed attribute layout, no per-instance __dict__
+    __slots__ = ("name",)
+
     def __init__(self, name:str):
         self.name = name
 
@@ -18,41 +59,59 @@ class Sensor:
     def read(self):
         raise NotImplementedError
 
+#Reads return raw floats, precision is fixed once at format time in to_json
 class SpindleTempSensor(Sensor):
-    def read(self):
-        return round(random.uniform(45, 100), 2)
+    __slots__ = ()
+
+    def read(self) -> float:
+        return random.uniform(45, 100)
 
 class VibrationSensor(Sensor):
-    def read(self):
-        return round(random.uniform(0.2, 4.0), 2)
+    __slots__ = ()
+
+    def read(self) -> float:
+        return random.uniform(0.2, 4.0)
 
 class PowerDrawSensor(Sensor):
-    def read(self):
-        return round(random.uniform(200, 450), 1)
+    __slots__ = ()
+
+    def read(self) -> float:
+        return random.uniform(200, 450)
 
 class PositionEncoder(Sensor):
-    def read(self):
+    __slots__ = ()
+
+    def read(self) -> dict:
         #Return dict for clarity
         return {
-            "X": round(random.uniform(0, 100), 1),
-            "Y": round(random.uniform(0, 100), 1),
-            "Z": round(random.uniform(0, 50), 1),
+            "X": random.uniform(0, 100),
+            "Y": random.uniform(0, 100),
+            "Z": random.uniform(0, 50),
         }
 
 class VisionQCSensor(Sensor):
-    def read(self):
+    __slots__ = ()
+
+    def read(self) -> str:
         #Tests either pass or fail for quality control
-        return random.choice(["PASS", "FAIL"])
+        return RESULT_NAMES[_randrange(2)]
 
 class AutomaticToolChanger:
+    __slots__ = ("tools", "current_tool", "_n_tools", "_next_change")
+
     def __init__(self, tools: list[int]):
         self.tools = tools
         self.current_tool = tools[0]
-
-    def check_and_change_tool(self, cycle_id: int):
-        #Checks every 10th cycle and changes tool (this can be changed at a later date)
-        if cycle_id % 10 == 0:
-            self.current_tool = random.choice(self.tools)
+        self._n_tools = len(tools)
+        #Countdown to the next change, cheaper than a modulo check per cycle
+        self._next_change = 10
+
+    def check_and_change_tool(self, cycle_id: int) -> int:
+        #Changes tool on every 10th call i.e. every 10th cycle (this can be changed at a later date)
+        self._next_change -= 1
+        if not self._next_change:
+            self._next_change = 10
+            self.current_tool = self.tools[_randrange(self._n_tools)]
         return self.current_tool
     
 #-------- Machine classes --------
@@ -60,22 +119,26 @@ class AutomaticToolChanger:
 there have used this and inherited it into other classes for the other 4 machines in the factory"""
 
 class Machine:
+    __slots__ = ("name",)
+
     def __init__(self, name: str):
         self.name = name
 
     #Raises not implemented as this is base case and doesn't represent one machine but a base for all machine
-    def perform_operation(self, cycle_id: int):
+    def perform_operation(self, cycle_id: int) -> dict:
         raise NotImplementedError
 
 class CNCMill(Machine):
+    __slots__ = ("atc",)
+
     def __init__(self, name: str, atc: AutomaticToolChanger):
         super().__init__(name)
         self.atc = atc
 
     #Operations for CNC are as below, cutting, drilling or idle
-    def perform_operation(self, cycle_id: int):
+    def perform_operation(self, cycle_id: int) -> dict:
         #Ramdomises the operation
-        op = random.choice(["cutting", "drilling", "idle"])
+        op = OP_NAMES[_randrange(3)]
         #Fetches tool number from function that randomises every 10th cycle from atc list
         tool = self.atc.check_and_change_tool(cycle_id)
         return {
@@ -85,19 +148,24 @@ class CNCMill(Machine):
 
 #Think about later
 class RoboticArm(Machine):
-    def perform_operation(self, cycle_id: int):
+    __slots__ = ()
+
+    def perform_operation(self, cycle_id: int) -> dict:
         #Randomises task from options in the list
-        task = random.choice(["load_material", "unload_part", "assemble_component", "idle"])
+        task = TASK_NAMES[_randrange(4)]
         return {
             "robotic_arm_task": task
         }
 
 #Think about later
 class ConveyorBelt(Machine):
-    def perform_operation(self, cycle_id: int):
+    __slots__ = ()
+
+    def perform_operation(self, cycle_id: int) -> dict:
         #Simulate part movement and tracking
-        position = random.choice(["Station A", "Station B", "Inspection", "Exit"])
-        part_id = f"PART-{1000 + cycle_id}"
+        position = STATION_NAMES[_randrange(4)]
+        #Plain concat beats an f-string interpolation for a simple int suffix
+        part_id = "PART-" + str(1000 + cycle_id)
         return {
             "conveyor_position": position,
             "part_id": part_id
@@ -105,10 +173,12 @@ class ConveyorBelt(Machine):
 
 #Think about later
 class InspectionSystem(Machine):
-    def perform_operation(self, cycle_id: int):
+    __slots__ = ()
+
+    def perform_operation(self, cycle_id: int) -> dict:
         #Decides if part is in good condition and to what degree
-        decision = random.choice(["PASS", "FAIL"])
-        confidence = round(random.uniform(0.7, 1.0), 2)
+        decision = RESULT_NAMES[_randrange(2)]
+        confidence = random.uniform(0.7, 1.0)
         return {
             "inspection_result": decision,
             "inspection_confidence": confidence
@@ -118,6 +188,8 @@ class InspectionSystem(Machine):
 """The section below takes inputs and transforms to document"""
 
 class SimulationMessage:
+    __slots__ = ("cycle_id", "timestamp", "machine", "sensors")
+
     #All information listed in the format below
     def __init__(self, cycle_id: int, machine_data: dict, sensor_readings: dict):
         self.cycle_id = cycle_id
@@ -125,39 +197,295 @@ class SimulationMessage:
         self.machine = machine_data
         self.sensors = sensor_readings
 
-    #Json output below
-    def to_json(self):
-        payload = {
-            "cycle_id": self.cycle_id,
-            "timestamp": self.timestamp,
-            **self.machine,
-            **self.sensors
+    #One template shared by every payload, .copy() keeps the key layout stable
+    #(CPython shares the key table) instead of rehashing every key through ** merges
+    _PAYLOAD_TEMPLATE = {
+        "cycle_id": 0,
+        "timestamp": 0.0,
+        "operation": "",
+        "tool_id": 0,
+        "robotic_arm_task": "",
+        "conveyor_position": "",
+        "part_id": "",
+        "inspection_result": "",
+        "inspection_confidence": 0.0,
+        "spindle_temp": 0.0,
+        "vibration": 0.0,
+        "power_draw": 0.0,
+        "position": None,
+        "inspection": "",
+        "kg_node": None,
+        "kg_triple": None,
+    }
+
+    #Json output below, the classification and triple are folded straight in so the
+    #payload is built and serialised exactly once on the emit path, precision is
+    #quantised here at the emit boundary since the draw paths hand over raw floats
+    def to_json(self, classification=None, kg_triple=None) -> str:
+        m = self.machine
+        s = self.sensors
+        pos = s["position"]
+        payload = self._PAYLOAD_TEMPLATE.copy()
+        payload["cycle_id"] = self.cycle_id
+        payload["timestamp"] = self.timestamp
+        payload["operation"] = m["operation"]
+        payload["tool_id"] = m["tool_id"]
+        payload["robotic_arm_task"] = m["robotic_arm_task"]
+        payload["conveyor_position"] = m["conveyor_position"]
+        payload["part_id"] = m["part_id"]
+        payload["inspection_result"] = m["inspection_result"]
+        payload["inspection_confidence"] = round(m["inspection_confidence"], 2)
+        payload["spindle_temp"] = round(s["spindle_temp"], 2)
+        payload["vibration"] = round(s["vibration"], 2)
+        payload["power_draw"] = round(s["power_draw"], 1)
+        payload["position"] = {
+            "X": round(pos["X"], 1),
+            "Y": round(pos["Y"], 1),
+            "Z": round(pos["Z"], 1),
         }
-        return json.dumps(payload)
+        payload["inspection"] = s["inspection"]
+        payload["kg_node"] = classification
+        payload["kg_triple"] = kg_triple
+        if orjson is not None:
+            #default=list renders the KG triple tuples as arrays like stdlib json
+            return orjson.dumps(payload, default=list).decode()
+        return json.dumps(payload, separators=(",", ":"))
 
 #-------- Engine --------
 """This section manages creating the factory that holds the machines and sensors, it also has an
 option between simulation data and real data"""
 
+#PCG32 step (O'Neill's generator), much cheaper per draw than np.random once the
+#caller is already JIT compiled, returns the advanced state and a uniform in [0,1)
+@njit(cache=True)
+def _pcg32(state):
+    state = state * np.uint64(6364136223846793005) + np.uint64(0xda3e39cb94b95bdb)
+    xorshifted = np.uint32(((state >> np.uint64(18)) ^ state) >> np.uint64(27))
+    rot = np.uint32(state >> np.uint64(59))
+    out = np.uint32((xorshifted >> rot) | (xorshifted << ((np.uint32(32) - rot) & np.uint32(31))))
+    return state, np.float64(out >> np.uint32(8)) * (1.0 / 16777216.0)
+
+#Draws every column AND classifies in one parallel pass, cycles are independent so
+#prange splits them across cores without the GIL. Each cycle gets its own PCG
+#stream (seed + i * golden ratio) so iteration order doesn't matter, and the tool
+#draw is hash-seeded per 10-cycle block so every cycle in a block agrees on it
+@njit(parallel=True, cache=True)
+def _simulate_kernel(n, seed, spindle, vibration, power, posX, posY, posZ,
+                     ops, tasks, stations, inspections, confidences, qc,
+                     tool_ids, tools, initial_tool, labels):
+    for i in prange(n):
+        state = (np.uint64(seed) + np.uint64(i) * np.uint64(0x9E3779B97F4A7C15)) | np.uint64(1)
+        state, u = _pcg32(state)
+        spindle[i] = 45.0 + u * 55.0
+        state, u = _pcg32(state)
+        vibration[i] = 0.2 + u * 3.8
+        state, u = _pcg32(state)
+        power[i] = 200.0 + u * 250.0
+        state, u = _pcg32(state)
+        posX[i] = u * 100.0
+        state, u = _pcg32(state)
+        posY[i] = u * 100.0
+        state, u = _pcg32(state)
+        posZ[i] = u * 50.0
+        state, u = _pcg32(state)
+        ops[i] = int(u * 3)
+        state, u = _pcg32(state)
+        tasks[i] = int(u * 4)
+        state, u = _pcg32(state)
+        stations[i] = int(u * 4)
+        state, u = _pcg32(state)
+        inspections[i] = int(u * 2)
+        state, u = _pcg32(state)
+        confidences[i] = 0.7 + u * 0.3
+        state, u = _pcg32(state)
+        qc[i] = int(u * 2)
+        #Tool holds until each 10th cycle (cycle_id = i + 1) re-draws it
+        block = (i + 1) // 10
+        if block == 0:
+            tool = initial_tool
+        else:
+            bstate = (np.uint64(seed) ^ (np.uint64(block) * np.uint64(0xD1B54A32D192ED03))) | np.uint64(1)
+            bstate, bu = _pcg32(bstate)
+            tool = tools[int(bu * len(tools))]
+        tool_ids[i] = tool
+        labels[i] = _classify_kernel(spindle[i], vibration[i], power[i],
+                                     posX[i], posY[i], posZ[i], tool, qc[i] == 1)
+
+#GPU classifier, the same branch tree as _classify_kernel as one elementwise
+#kernel so a whole batch of labels comes back in a single device pass
+if cp is not None:
+    _classify_gpu = cp.ElementwiseKernel(
+        "float32 s, float32 v, float32 p, float32 x, float32 y, float32 z, int32 tool, bool fail",
+        "int8 out",
+        """
+        float dx = fabsf(x - 50.0f), dy = fabsf(y - 30.0f), dz = fabsf(z - 10.0f);
+        float max_dev = dx > dy ? dx : dy;
+        if (dz > max_dev) max_dev = dz;
+        if (s < 75.0f) { out = 0; }
+        else if (s > 75.0f && s <= 90.0f) { out = 1; }
+        else if (s > 90.0f) {
+            if (p > 350.0f && p < 400.0f) { out = 2; }
+            else if (p >= 400.0f) { out = 3; }
+            else { out = 4; }
+        }
+        else if (v < 1.5f) { out = 5; }
+        else if (v > 1.5f && v <= 3.5f) { out = 6; }
+        else if (v > 3.5f) { out = 7; }
+        else if (p < 350.0f) { out = 8; }
+        else if (p >= 350.0f && p < 400.0f) { out = 9; }
+        else if (p >= 400.0f) { out = 10; }
+        else if (max_dev < 5.0f && max_dev > 10.0f) { out = 11; }
+        else if (max_dev > 5.0f && max_dev <= 10.0f) { out = 12; }
+        else if (max_dev > 10.0f) { out = 13; }
+        else if (tool != 0 && (tool < 1 || tool > 3)) { out = 14; }
+        else if (fail) { out = 15; }
+        else { out = 16; }
+        """,
+        "classify")
+
 #Creates CNC object containing machines and sensors
 class CNCFactory:
     def __init__(self, machines:list[Machine], sensors:list[Sensor]):
         self.machines = machines
         self.sensors = sensors
+        #Vectorised sensor set-up, one uniform draw covers every scalar channel
+        #(spindle, vibration, power plus the X/Y/Z axes of the position encoder)
+        self._rng = np.random.default_rng()
+        self._names = ("spindle_temp", "vibration", "power_draw", "X", "Y", "Z")
+        self._lows = np.array([45.0, 0.2, 200.0, 0.0, 0.0, 0.0])
+        self._highs = np.array([100.0, 4.0, 450.0, 100.0, 100.0, 50.0])
+        #Bound methods resolved once so the cycle loop skips the attribute lookup
+        #and MRO walk per call
+        self._operators = tuple(m.perform_operation for m in machines)
+        self._readers = tuple((s.name, s.read) for s in sensors)
+        #The single-draw fast path only knows the standard channel layout, any
+        #other sensor list goes through read_sensors instead
+        self._vector_sensors = tuple(s.name for s in sensors) == (
+            "spindle_temp", "vibration", "power_draw", "position", "inspection")
+        #Number of cycles pregenerated as columns, 0 means draw per cycle
+        self.num_pregen = 0
+        #MODE doesn't change mid-run so resolve the env var and the branch once
+        self._real_data = self.read_real_data() if os.getenv("MODE", "SIM") == "REAL" else None
+
+    #Pre-generates n cycles worth of data, one contiguous float32/int column per
+    #channel (structure-of-arrays), run_cycle then only indexes into the buffers
+    def pregenerate(self, n: int) -> None:
+        atc = self.machines[0].atc
+        self.spindle = np.empty(n, dtype=np.float32)
+        self.vibration = np.empty(n, dtype=np.float32)
+        self.power = np.empty(n, dtype=np.float32)
+        self.posX = np.empty(n, dtype=np.float32)
+        self.posY = np.empty(n, dtype=np.float32)
+        self.posZ = np.empty(n, dtype=np.float32)
+        #Codes and tool ids all fit in a byte, narrower columns mean fewer bytes
+        #scanned per cycle once the loop is memory-bound
+        self.ops = np.empty(n, dtype=np.int8)
+        self.tasks = np.empty(n, dtype=np.int8)
+        self.stations = np.empty(n, dtype=np.int8)
+        self.inspections = np.empty(n, dtype=np.int8)
+        self.confidences = np.empty(n, dtype=np.float32)
+        self.qc = np.empty(n, dtype=np.int8)
+        self.tool_ids = np.empty(n, dtype=np.int8)
+        self.labels = np.empty(n, dtype=np.int8)
+        if _HAVE_NUMBA:
+            #One fused parallel kernel draws every column and classifies it, the
+            #print/send step stays serial in run_cycle after this returns
+            _simulate_kernel(n, int(self._rng.integers(1, 1 << 63)),
+                             self.spindle, self.vibration, self.power,
+                             self.posX, self.posY, self.posZ,
+                             self.ops, self.tasks, self.stations,
+                             self.inspections, self.confidences, self.qc,
+                             self.tool_ids, np.asarray(atc.tools), atc.current_tool,
+                             self.labels)
+        else:
+            #Without numba the fused kernel would just be a slow python loop, so
+            #draw the columns with numpy and batch-classify them instead
+            rng = self._rng
+            self.spindle[:] = rng.uniform(45, 100, n)
+            self.vibration[:] = rng.uniform(0.2, 4.0, n)
+            self.power[:] = rng.uniform(200, 450, n)
+            self.posX[:] = rng.uniform(0, 100, n)
+            self.posY[:] = rng.uniform(0, 100, n)
+            self.posZ[:] = rng.uniform(0, 50, n)
+            self.ops[:] = rng.integers(0, 3, n)
+            self.tasks[:] = rng.integers(0, 4, n)
+            self.stations[:] = rng.integers(0, 4, n)
+            self.inspections[:] = rng.integers(0, 2, n)
+            self.confidences[:] = rng.uniform(0.7, 1.0, n)
+            self.qc[:] = rng.integers(0, 2, n)
+            #Tool only changes on every 10th cycle so draw once per block and repeat
+            self.tool_ids[:min(9, n)] = atc.current_tool
+            n_changes = n // 10
+            if n_changes:
+                draws = rng.choice(atc.tools, size=n_changes)
+                self.tool_ids[9:] = np.repeat(draws, 10)[:n - 9]
+            self.labels[:] = classify_batch(self.spindle, self.vibration, self.power,
+                                            self.posX, self.posY, self.posZ,
+                                            self.tool_ids, self.qc == 1)
+        if n:
+            atc.current_tool = int(self.tool_ids[-1])
+        #Part ids are deterministic so build them once instead of formatting per cycle
+        self._part_ids = ["PART-" + str(1000 + i) for i in range(1, n + 1)]
+        self.num_pregen = n
+
+    #GPU mass-simulation mode for very large n, all RNG and classification happen
+    #on device and each column comes back as one contiguous transfer, after which
+    #run_cycle works exactly as with the CPU pregenerate
+    def pregenerate_gpu(self, n: int) -> None:
+        if cp is None:
+            raise RuntimeError("cupy is not installed, GPU mode unavailable")
+        atc = self.machines[0].atc
+        spindle = cp.random.uniform(45, 100, n).astype(cp.float32)
+        vibration = cp.random.uniform(0.2, 4.0, n).astype(cp.float32)
+        power = cp.random.uniform(200, 450, n).astype(cp.float32)
+        posX = cp.random.uniform(0, 100, n).astype(cp.float32)
+        posY = cp.random.uniform(0, 100, n).astype(cp.float32)
+        posZ = cp.random.uniform(0, 50, n).astype(cp.float32)
+        ops = cp.random.randint(0, 3, n).astype(cp.int8)
+        tasks = cp.random.randint(0, 4, n).astype(cp.int8)
+        stations = cp.random.randint(0, 4, n).astype(cp.int8)
+        inspections = cp.random.randint(0, 2, n).astype(cp.int8)
+        confidences = (0.7 + cp.random.uniform(0, 0.3, n)).astype(cp.float32)
+        qc = cp.random.randint(0, 2, n).astype(cp.int8)
+        #Same every-10th-cycle tool rule as the CPU path, one draw per block
+        tool_ids = cp.full(n, atc.current_tool, dtype=cp.int32)
+        n_changes = n // 10
+        if n_changes:
+            draws = cp.asarray(np.asarray(atc.tools))[cp.random.randint(0, len(atc.tools), n_changes)]
+            tool_ids[9:] = cp.repeat(draws, 10)[:n - 9].astype(cp.int32)
+        labels = _classify_gpu(spindle, vibration, power, posX, posY, posZ,
+                               tool_ids, qc == 1)
+        self.spindle = cp.asnumpy(spindle)
+        self.vibration = cp.asnumpy(vibration)
+        self.power = cp.asnumpy(power)
+        self.posX = cp.asnumpy(posX)
+        self.posY = cp.asnumpy(posY)
+        self.posZ = cp.asnumpy(posZ)
+        self.ops = cp.asnumpy(ops)
+        self.tasks = cp.asnumpy(tasks)
+        self.stations = cp.asnumpy(stations)
+        self.inspections = cp.asnumpy(inspections)
+        self.confidences = cp.asnumpy(confidences)
+        self.qc = cp.asnumpy(qc)
+        self.tool_ids = cp.asnumpy(tool_ids)
+        self.labels = cp.asnumpy(labels)
+        if n:
+            atc.current_tool = int(self.tool_ids[-1])
+        self._part_ids = ["PART-" + str(1000 + i) for i in range(1, n + 1)]
+        self.num_pregen = n
+
+    #Generic per-sensor path for non-standard sensor lists, a dict comprehension
+    #over the pre-bound read methods
+    def read_sensors(self) -> dict:
+        return {name: read() for name, read in self._readers}
 
     #Option for data selection
-    def get_data_source(self):
-        #Fetches enviroment variable mode, if it doesn't exist then data is SIM
-        mode = os.getenv("MODE", "SIM")
-        #Reading real data
-        if mode == "REAL":
-            return self.read_real_data()
-        #Reading SIM data
-        else:
-            return None
+    def get_data_source(self) -> dict | None:
+        #Mode was resolved once in __init__, None means SIM data
+        return self._real_data
 
     #Fetches REAL data
-    def read_real_data(self):
+    def read_real_data(self) -> dict:
         #Example data below/placeholder
         return {
             "operation": "cutting",
@@ -170,16 +498,31 @@ class CNCFactory:
         }
 
     #Runs cycles for the simulaton
-    def run_cycle(self, cycle_id: int):
-        #1. Machine operations (loops through machines and completes any operations)
-        machine_data = {}
-        for m in self.machines:
-            machine_data.update(m.perform_operation(cycle_id))
+    def run_cycle(self, cycle_id: int) -> None:
+        i = cycle_id - 1
+        pregen = self.num_pregen and i < self.num_pregen
+
+        #1. Machine operations (indexes the pregenerated columns, or loops through
+        #the machines and completes any operations when nothing is pregenerated)
+        if pregen:
+            machine_data = {
+                "operation": OP_NAMES[self.ops[i]],
+                "tool_id": int(self.tool_ids[i]),
+                "robotic_arm_task": TASK_NAMES[self.tasks[i]],
+                "conveyor_position": STATION_NAMES[self.stations[i]],
+                "part_id": self._part_ids[i],
+                "inspection_result": RESULT_NAMES[self.inspections[i]],
+                "inspection_confidence": float(self.confidences[i]),
+            }
+        else:
+            machine_data = {}
+            for op in self._operators:
+                machine_data.update(op(cycle_id))
 
         #2. Sensor readings (reads sensors or if real-data is over-riden then use that)
         sensor_readings = {}
-        #Real-data override?
-        real = self.get_data_source()
+        #Real-data override? (cached in __init__, no env lookup per cycle)
+        real = self._real_data
         if real:
             sensor_readings = {
                 "spindle_temp": real["spindle_temp"],
@@ -188,150 +531,303 @@ class CNCFactory:
                 "position": real["position"],
                 "inspection": real["inspection"],
             }
+        elif pregen:
+            sensor_readings = {
+                "spindle_temp": float(self.spindle[i]),
+                "vibration": float(self.vibration[i]),
+                "power_draw": float(self.power[i]),
+                "position": {
+                    "X": float(self.posX[i]),
+                    "Y": float(self.posY[i]),
+                    "Z": float(self.posZ[i]),
+                },
+                "inspection": RESULT_NAMES[self.qc[i]],
+            }
+        elif self._vector_sensors:
+            #One C-level call draws all scalar channels instead of a read() per sensor
+            vals = self._rng.uniform(self._lows, self._highs).tolist()
+            sensor_readings = dict(zip(self._names[:3], vals[:3]))
+            #Pack the axis channels back into the dict the encoder used to return
+            sensor_readings["position"] = dict(zip(("X", "Y", "Z"), vals[3:]))
+            sensor_readings["inspection"] = RESULT_NAMES[_randrange(2)]
         else:
-            for s in self.sensors:
-                sensor_readings[s.name] = s.read()
+            sensor_readings = self.read_sensors()
 
         #3. Package & send (returns packages)
         msg = SimulationMessage(cycle_id, machine_data, sensor_readings)
-        classification = classify_state(sensor_readings, machine_data, kg_maps)
-        send_to_KG(msg.to_json(), classification)
+        if pregen and real is None:
+            #Labels were already classified inside the parallel kernel
+            label_id = int(self.labels[i])
+        else:
+            #Real-data override has to be classified on its own readings, the
+            #pregenerated labels belong to the simulated columns
+            label_id = classify_id(sensor_readings, machine_data)
+        classification = classification_for(label_id, kg_maps)
+        send_to_KG(msg, label_id, classification)
 
 # ---- KG Mapping & Output ----
 #Not complete yet
 
-def load_kg_csv(file_path):
+def load_kg_csv(file_path: str) -> dict:
     #Initialises hashmap/dictionary
     mapping = {}
     try:
         #Opens file in read mode
-        with open(file_path, mode='r', encoding='utf-8-sig') as file:
-            #Reads and normalises CSV
+        with open(file_path, mode='r', encoding='utf-8-sig', newline='') as file:
+            #Tuple-at-a-time reader, no per-row dict build like DictReader does
             raw = csv.reader(file)
-            headers = next(raw)
-            headers = [h.strip().lower() for h in headers]
-            file.seek(0)
-            reader = csv.DictReader(file, fieldnames=headers)
-            next(reader)
+            headers = [h.strip().lower() for h in next(raw)]
             print("CSV Headers (normalized):", headers)
-            #Loops through 
+            src_i = headers.index("source entity")
+            rel_i = headers.index("relationship")
+            tgt_i = headers.index("target entity")
+            width = max(src_i, rel_i, tgt_i) + 1
+            #Loops through
             row_count = 0
-            for row in reader:
+            for row in raw:
                 row_count += 1
-                #CSV removes uneccessary information and it them checks the row is in a triple format
-                row = { (k or "").strip().lower(): (v or "").strip() for k, v in row.items() }
-                if not row.get("source entity"):
+                #Checks the row is in a triple format
+                if len(row) < width or not row[src_i].strip():
                     print(f"[WARN] Missing 'Source entity' at CSV line {row_count+1}")
                     continue
-                if not row.get("relationship") or not row.get("target entity"):
+                relationship = row[rel_i].strip()
+                target = row[tgt_i].strip()
+                if not relationship or not target:
                     print(f"[WARN] Incomplete triple at CSV line {row_count+1}: {row}")
                     continue
-                #CSV record put into correct triple format and added to map
-                source = row["source entity"]
-                triple = {
-                    "relationship": row["relationship"],
-                    "target_entity": row["target entity"],
-                }
-                mapping.setdefault(source, []).append(triple)
+                #Interned source keys make the later lookups pointer compares, and a
+                #2-tuple per triple packs tighter than a dict
+                mapping.setdefault(sys.intern(row[src_i].strip()), []).append((relationship, target))
             print(f"[INFO] Loaded {row_count} rows; {len(mapping)} unique sources")
     #If not map is found
     except FileNotFoundError:
         print(f"[WARNING] KG file not found: {file_path}")
     return mapping
 
-def classify_state(sensors: dict, machine: dict,  kg_maps: dict):
+#Integer codes returned by the JIT kernel, LABELS maps them back to the KG strings
+LABEL_TEMP_NORMAL = 0
+LABEL_POSSIBLE_OVERHEATING = 1
+LABEL_POSSIBLE_GLITCH = 2
+LABEL_LIKELY_GLITCH = 3
+LABEL_SPINDLE_OVERHEAT = 4
+LABEL_VIBRATION_NORMAL = 5
+LABEL_POSSIBLE_VIBRATION = 6
+LABEL_LIKELY_VIBRATION = 7
+LABEL_POWER_NORMAL = 8
+LABEL_POSSIBLE_LOAD = 9
+LABEL_HIGH_POWER = 10
+LABEL_POSITION_GOOD = 11
+LABEL_POSITION_DRIFT = 12
+LABEL_POSITION_MAJOR = 13
+LABEL_TOOL_CHANGE = 14
+LABEL_INSPECTION_FAIL = 15
+LABEL_NORMAL_OP = 16
+
+LABELS = (
+    "Normal_KG:Temperature_Normal",
+    "Maintenance_KG:Possible_Overheating",
+    "Cyberattack_KG:Possible_Glitch/Firmware",
+    "Cyberattack_KG:Likely_Glitch/Firmware",
+    "Maintenance_KG:Spindle_Overheat",
+    "Normal_KG:Vibration_Normal",
+    "Cyberattack_KG:Possible_Vibration_Sabotage",
+    "Cyberattack_KG:Likely_Vibration_Sabotage",
+    "Normal_KG:Normal_Power_Consumption",
+    "PowerDraw_KG:Possible_Elevated_Load",
+    "PowerDraw_KG:High_Power_Consumption",
+    "Normal_KG:Position_Encoder_Good",
+    "Maintenance_KG:Minor_Position_Drift",
+    "Cyberattack_KG:Major_Position_Change",
+    "Maintenance_KG:Tool_Change",
+    "Normal_KG:Inspection_Fail",
+    "Normal_KG:Operation_Normal",
+)
+
+#Pure branchy arithmetic with no dict access so numba compiles it to native code,
+#fastmath is safe here as the kernel is only comparisons
+@njit(cache=True, fastmath=True)
+def _classify_kernel(spindle: float, vibration: float, power: float,
+                     posX: float, posY: float, posZ: float,
+                     tool_id: int, inspection_fail: bool) -> int:
     #Overheating check
-    if sensors["spindle_temp"] < 75:
-        return "Normal_KG:Temperature_Normal"
-    
-    elif sensors["spindle_temp"] > 75 and sensors["spindle_temp"] <= 90:
-        return "Maintenance_KG:Possible_Overheating"
-    
-    elif sensors["spindle_temp"] > 90:
+    if spindle < 75:
+        return LABEL_TEMP_NORMAL
+    elif spindle > 75 and spindle <= 90:
+        return LABEL_POSSIBLE_OVERHEATING
+    elif spindle > 90:
         #Glitch/firmware injection check
-        if sensors["power_draw"] > 350 and sensors["power_draw"] < 400:
-            return "Cyberattack_KG:Possible_Glitch/Firmware"
-        
-        elif sensors["power_draw"] >= 400:
-            results = [
-            (issue, kg_maps[kg][issue])
+        if power > 350 and power < 400:
+            return LABEL_POSSIBLE_GLITCH
+        elif power >= 400:
+            return LABEL_LIKELY_GLITCH
+        #Overheat return
+        else:
+            return LABEL_SPINDLE_OVERHEAT
+
+    #Vibration sabotage
+    if vibration < 1.5:
+        return LABEL_VIBRATION_NORMAL
+    elif vibration > 1.5 and vibration <= 3.5:
+        return LABEL_POSSIBLE_VIBRATION
+    elif vibration > 3.5:
+        return LABEL_LIKELY_VIBRATION
+
+    #Power draw detection
+    if power < 350:
+        return LABEL_POWER_NORMAL
+    elif power >= 350 and power < 400:
+        return LABEL_POSSIBLE_LOAD
+    elif power >= 400:
+        return LABEL_HIGH_POWER
+
+    #Position encoder, expected X/Y/Z is 50/30/10 with 5mm warning and 10mm fault
+    TOLERANCE_WARNING = 5.0
+    TOLERANCE_CRITICAL = 10.0
+    max_dev = max(abs(posX - 50.0), abs(posY - 30.0), abs(posZ - 10.0))
+    if max_dev < TOLERANCE_WARNING and max_dev > TOLERANCE_CRITICAL:
+        return LABEL_POSITION_GOOD
+    elif max_dev > TOLERANCE_WARNING and max_dev <= TOLERANCE_CRITICAL:
+        return LABEL_POSITION_DRIFT
+    elif max_dev > TOLERANCE_CRITICAL:
+        return LABEL_POSITION_MAJOR
+
+    #Tool change
+    if tool_id != 0 and tool_id != 1 and tool_id != 2 and tool_id != 3:
+        return LABEL_TOOL_CHANGE
+
+    #Inspection system
+    if inspection_fail:
+        return LABEL_INSPECTION_FAIL
+    return LABEL_NORMAL_OP
+
+#Unpacks the dicts so the kernel only sees plain scalars, returns the label code
+def classify_id(sensors: dict, machine: dict) -> int:
+    pos = sensors["position"]
+    return _classify_kernel(
+        sensors["spindle_temp"], sensors["vibration"], sensors["power_draw"],
+        pos["X"], pos["Y"], pos["Z"],
+        machine.get("tool_id", 0), sensors["inspection"] == "FAIL",
+    )
+
+def classify_state(sensors: dict, machine: dict,  kg_maps: dict):
+    return classification_for(classify_id(sensors, machine), kg_maps)
+
+#Maps a kernel label code to the classification string, shared by the per-cycle
+#path and the pregenerated path where the codes come straight out of the kernel
+def classification_for(label_id: int, kg_maps: dict):
+    label = LABELS[label_id]
+
+    #The likely/high severity labels also carry their related KG triples
+    #Lists rather than tuples throughout, orjson doesn't serialise tuples and the
+    #JSON output is identical either way
+    if label_id == LABEL_LIKELY_GLITCH:
+        results = [
+            [issue, kg_maps[kg][issue]]
             for kg in ["Maintenance_KG", "Normal_KG", "Cyberattack_KG"]
             for issue in ["Overheating","Power Draw Monitor","Dull Tool","Excessive Power Usage","Firmware Injection","Firmware Glitch"]
             if issue in kg_maps[kg]]
-            return "Cyberattack_KG:Likely_Glitch/Firmware",results
-        
-        #Overheat message return
-        else:
-            results = [
+        return [label, results]
+    if label_id == LABEL_SPINDLE_OVERHEAT:
+        results = [
             kg_maps[kg]["Overheating"]
             for kg in ["Maintenance_KG", "Normal_KG", "Cyberattack_KG"]
             if "Overheating" in kg_maps[kg]]
-        return "Maintenance_KG:Spindle_Overheat",results
-        
-    #Vibration sabotage
-    if sensors["vibration"] < 1.5:
-        return "Normal_KG:Vibration_Normal"
-    elif sensors["vibration"] > 1.5 and sensors["vibration"] <= 3.5:
-        return "Cyberattack_KG:Possible_Vibration_Sabotage"
-    elif sensors["vibration"] > 3.5:
+        return [label, results]
+    if label_id == LABEL_LIKELY_VIBRATION:
         results = [
-            (issue, kg_maps[kg][issue])
+            [issue, kg_maps[kg][issue]]
             for kg in ["Maintenance_KG", "Normal_KG", "Cyberattack_KG"]
             for issue in ["Vibration Sensor","Vibration Sensor","Misalignment"]
             if issue in kg_maps[kg]]
-        return "Cyberattack_KG:Likely_Vibration_Sabotage",results
-    
-    #Power draw detection
-    if sensors["power_draw"] < 350:
-        return "Normal_KG:Normal_Power_Consumption"
-    elif sensors["power_draw"] >= 350 and sensors["power_draw"] < 400:
-        return "PowerDraw_KG:Possible_Elevated_Load"
-    elif sensors["power_draw"] >= 400:
+        return [label, results]
+    if label_id == LABEL_HIGH_POWER:
         results = [
-            (issue, kg_maps[kg][issue])
+            [issue, kg_maps[kg][issue]]
             for kg in ["Maintenance_KG", "Normal_KG", "Cyberattack_KG"]
             for issue in ["Power Draw Monitor","Excessive Power Usage"]
             if issue in kg_maps[kg]]
-        return "PowerDraw_KG:High_Power_Consumption",results
-    
-    #Position encoder
-    EXPECTED_POSITION = {"X": 50.0, "Y": 30.0, "Z": 10.0}
-    #mm difference for warning
-    TOLERANCE_WARNING = 5.0
-    #mm difference for fault
-    TOLERANCE_CRITICAL = 10.0
-    pos = sensors["position"]
-    max_dev = max(abs(pos[axis] - EXPECTED_POSITION[axis]) for axis in ["X", "Y", "Z"])    
-    if max_dev < TOLERANCE_WARNING and max_dev > TOLERANCE_CRITICAL:
-        return "Normal_KG:Position_Encoder_Good"
-    elif max_dev > TOLERANCE_WARNING and max_dev <= TOLERANCE_CRITICAL:
-        return "Maintenance_KG:Minor_Position_Drift"
-    elif max_dev > TOLERANCE_CRITICAL:
-        return "Cyberattack_KG:Major_Position_Change"
-    
-    #Tool change
-    if machine.get("tool_id") and machine["tool_id"] not in [1, 2, 3]:
-        return "Maintenance_KG:Tool_Change"
-    
-    #Inspection system
-    if sensors["inspection"] == "FAIL":
-        return "Normal_KG:Inspection_Fail"
-    return "Normal_KG:Operation_Normal"
-
-def send_to_KG(payload_json: str, classification: str):
-    record = json.loads(payload_json)
-    record["kg_node"] = classification
+        return [label, results]
+    return label
+
+#Batch version of the classifier for the pregenerated columns, every predicate is
+#one NumPy pass over a column and np.select keeps the same first-match priority
+#order as the if/elif chain in the kernel above
+def classify_batch(spindle, vib, power, posX, posY, posZ, tool, insp):
+    max_dev = np.maximum(np.maximum(np.abs(posX - 50.0), np.abs(posY - 30.0)), np.abs(posZ - 10.0))
+    conditions = [
+        spindle < 75,
+        (spindle > 75) & (spindle <= 90),
+        (spindle > 90) & (power > 350) & (power < 400),
+        (spindle > 90) & (power >= 400),
+        spindle > 90,
+        vib < 1.5,
+        (vib > 1.5) & (vib <= 3.5),
+        vib > 3.5,
+        power < 350,
+        (power >= 350) & (power < 400),
+        power >= 400,
+        (max_dev < 5.0) & (max_dev > 10.0),
+        (max_dev > 5.0) & (max_dev <= 10.0),
+        max_dev > 10.0,
+        (tool != 0) & ((tool < 1) | (tool > 3)),
+        insp,
+    ]
+    codes = [
+        LABEL_TEMP_NORMAL,
+        LABEL_POSSIBLE_OVERHEATING,
+        LABEL_POSSIBLE_GLITCH,
+        LABEL_LIKELY_GLITCH,
+        LABEL_SPINDLE_OVERHEAT,
+        LABEL_VIBRATION_NORMAL,
+        LABEL_POSSIBLE_VIBRATION,
+        LABEL_LIKELY_VIBRATION,
+        LABEL_POWER_NORMAL,
+        LABEL_POSSIBLE_LOAD,
+        LABEL_HIGH_POWER,
+        LABEL_POSITION_GOOD,
+        LABEL_POSITION_DRIFT,
+        LABEL_POSITION_MAJOR,
+        LABEL_TOOL_CHANGE,
+        LABEL_INSPECTION_FAIL,
+    ]
+    return np.select(conditions, codes, default=LABEL_NORMAL_OP).astype(np.int8)
+
+#Resolves each label's triple once up-front so send_to_KG is a flat tuple index
+#instead of substring checks plus a dict lookup per cycle
+def _build_kg_triples(maps_by_prefix: dict) -> tuple:
+    table = []
+    for label in LABELS:
+        triple = None
+        for prefix, mapping in maps_by_prefix.items():
+            if prefix in label:
+                triple = mapping.get(label)
+                break
+        table.append(triple)
+    return tuple(table)
+
+#Output buffering, records go out in one write per batch instead of a flushed
+#print (a syscall) per cycle
+_OUT_BUF = []
+_FLUSH_EVERY = 1000
+_FLUSH_SECS = 1.0
+_last_flush = time.monotonic()
+
+def flush_output() -> None:
+    if _OUT_BUF:
+        sys.stdout.write("\n".join(_OUT_BUF) + "\n")
+        _OUT_BUF.clear()
+
+#Whatever is still buffered goes out when the program exits
+atexit.register(flush_output)
+
+def send_to_KG(msg: SimulationMessage, label_id: int, classification) -> None:
     #Replace with HTTP POST or message queue in real use
-    #print(json.dumps(record)) 
-    triple = None
-    if "Maintenance_KG" in classification:
-        triple = maintenance_map.get(classification)
-    elif "Normal_KG" in classification:
-        triple = normal_map.get(classification)
-    elif "Cyberattack_KG" in classification:
-        triple = cyberattack_map.get(classification)
-    record["kg_triple"] = triple
-    print(json.dumps(record))
+    global _last_flush
+    _OUT_BUF.append(msg.to_json(classification, KG_TRIPLES[label_id]))
+    now = time.monotonic()
+    if len(_OUT_BUF) >= _FLUSH_EVERY or now - _last_flush > _FLUSH_SECS:
+        flush_output()
+        _last_flush = now
 
 # ---- Main Execution ----
 
@@ -373,9 +869,15 @@ kg_maps = {
     "Cyberattack_KG": cyberattack_map
 }
 
+#Triple per label code, aligned with the LABELS tuple
+KG_TRIPLES = _build_kg_triples(kg_maps)
+
 #Instantiating factory using list of machines and sensory
 factory = CNCFactory(machines, sensors)
 
+#Fill the columns up-front so the loop below is just lookups
+factory.pregenerate(NUM_CYCLES)
+
 #Loops through cycles
 for cycle in range(1, NUM_CYCLES + 1):
     #Runs simulation cycle